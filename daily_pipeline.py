@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+import concurrent.futures
+
+from video_generator import AutoVideoCreator
+from youtube_uploader import YouTubeAutoUploader
+
+def run_pipeline():
+    """Create and upload the daily video"""
+    creator = AutoVideoCreator()
+    uploader = YouTubeAutoUploader()
+
+    # The ffmpeg encode runs in a subprocess and the OAuth refresh is
+    # network-bound, so the two overlap cleanly despite the GIL
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as pool:
+        video_future = pool.submit(creator.run_daily)
+        creds_future = pool.submit(uploader.get_credentials)
+        metadata = video_future.result()
+        creds = creds_future.result()
+
+    if not creds:
+        print("❌ No valid credentials. Authentication required.")
+        return None
+
+    return uploader.upload_video(
+        file_path=metadata['video_file'],
+        title=metadata['title'],
+        description=metadata['description'],
+        tags=metadata['tags']
+    )
+
+if __name__ == "__main__":
+    print("🚀 Starting daily pipeline")
+    result = run_pipeline()
+
+    if result:
+        print("\n🎉 SUCCESS! Video is now live on YouTube")
+        print(f"   https://youtube.com/watch?v={result['id']}")
+    else:
+        print("\n❌ Pipeline failed. Check errors above.")
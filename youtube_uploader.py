@@ -1,18 +1,40 @@
 #!/usr/bin/env python3
 import os
-import pickle
 import json
 from googleapiclient.discovery import build
 from googleapiclient.http import MediaFileUpload
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
 import requests
+from requests.adapters import HTTPAdapter
+
+UPLOAD_CHUNK_SIZE = 4 * 1024 * 1024  # 4 MiB per request keeps memory bounded
+
+# Shared session: keep-alive and TLS reuse instead of a fresh handshake per call
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+
+def _advise_sequential(file_path):
+    """Hint the kernel we'll stream the file front to back"""
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    try:
+        fd = os.open(file_path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        finally:
+            os.close(fd)
+    except OSError:
+        pass
 
 class YouTubeAutoUploader:
     def __init__(self):
         self.scopes = ["https://www.googleapis.com/auth/youtube.upload"]
         self.api_service_name = "youtube"
         self.api_version = "v3"
+        self._creds = None
         
     def get_credentials(self):
         """Get credentials using environment variables (for GitHub Actions)"""
@@ -24,10 +46,11 @@ class YouTubeAutoUploader:
         
         creds = None
         
-        # Try to load existing token
-        if os.path.exists("token.pickle"):
-            with open("token.pickle", "rb") as token:
-                creds = pickle.load(token)
+        # Try to load existing token (JSON - no pickle import on startup)
+        if os.path.exists("token.json"):
+            with open("token.json", "r") as token:
+                creds = Credentials.from_authorized_user_info(
+                    json.load(token), scopes=self.scopes)
         
         # If no valid credentials, get new ones
         if not creds or not creds.valid:
@@ -40,14 +63,16 @@ class YouTubeAutoUploader:
                 return None
             
             # Save credentials for next time
-            with open("token.pickle", "wb") as token:
-                pickle.dump(creds, token)
-        
+            with open("token.json", "w") as token:
+                token.write(creds.to_json())
+
+        self._creds = creds
         return creds
     
     def upload_video(self, file_path, title, description, tags, category_id="22"):
         """Upload video to YouTube"""
-        creds = self.get_credentials()
+        # Reuse credentials if they were fetched ahead of time (see daily_pipeline)
+        creds = self._creds or self.get_credentials()
         if not creds:
             print("❌ No valid credentials. Authentication required.")
             return None
@@ -68,15 +93,22 @@ class YouTubeAutoUploader:
         }
         
         try:
-            # Upload the video
-            media = MediaFileUpload(file_path, chunksize=-1, resumable=True)
+            # Upload the video in resumable chunks so a dropped connection
+            # doesn't restart the whole transfer
+            _advise_sequential(file_path)
+            media = MediaFileUpload(file_path, chunksize=UPLOAD_CHUNK_SIZE,
+                                    resumable=True, mimetype='video/mp4')
             request = youtube.videos().insert(
                 part=",".join(body.keys()),
                 body=body,
                 media_body=media
             )
-            
-            response = request.execute()
+
+            response = None
+            while response is None:
+                status, response = request.next_chunk()
+                if status:
+                    print(f"Upload progress: {int(status.progress() * 100)}%")
             print(f"✅ Video uploaded successfully!")
             print(f"Video ID: {response['id']}")
             print(f"Title: {response['snippet']['title']}")
@@ -100,18 +132,21 @@ class YouTubeAutoUploader:
             print(f"❌ Upload failed: {str(e)}")
             return None
 
+def get_refresh_token():
+    """Read the refresh token out of token.json when needed"""
+    try:
+        with open("token.json", "r") as f:
+            return json.load(f).get("refresh_token")
+    except (OSError, ValueError):
+        return None
+
 def get_video_info():
     """Read video metadata from file"""
-    video_info = {}
     try:
-        with open("video_info.txt", "r") as f:
-            for line in f:
-                if ": " in line:
-                    key, value = line.strip().split(": ", 1)
-                    video_info[key] = value
-        return video_info
+        with open("video_info.json", "r") as f:
+            return json.load(f)
     except FileNotFoundError:
-        print("❌ video_info.txt not found. Run video_generator.py first.")
+        print("❌ video_info.json not found. Run video_generator.py first.")
         return None
 
 def manual_auth_first_time():
@@ -147,19 +182,14 @@ def exchange_code_for_token(code):
         'redirect_uri': 'http://localhost:8080/'
     }
     
-    response = requests.post(token_url, data=data)
+    response = _SESSION.post(token_url, data=data, timeout=(5, 10))
     if response.status_code == 200:
         tokens = response.json()
         refresh_token = tokens.get('refresh_token')
         
         if refresh_token:
-            # Save refresh token to file for GitHub Actions
-            with open("refresh_token.txt", "w") as f:
-                f.write(refresh_token)
-            print(f"✅ Refresh token saved: {refresh_token[:20]}...")
-            
-            # Also save as pickle for local use
-            from google.oauth2.credentials import Credentials
+            # One atomic write: token.json already carries the refresh token,
+            # so no separate refresh_token.txt copy to drift out of sync
             creds = Credentials(
                 token=tokens.get('access_token'),
                 refresh_token=refresh_token,
@@ -168,10 +198,12 @@ def exchange_code_for_token(code):
                 client_secret=client_secret,
                 scopes=["https://www.googleapis.com/auth/youtube.upload"]
             )
-            
-            with open("token.pickle", "wb") as token:
-                pickle.dump(creds, token)
-            
+
+            with open("token.json.tmp", "w") as token:
+                token.write(creds.to_json())
+            os.replace("token.json.tmp", "token.json")
+            print(f"✅ Refresh token saved: {refresh_token[:20]}...")
+
             return True
         else:
             print("❌ No refresh token in response")
@@ -184,7 +216,7 @@ if __name__ == "__main__":
     print("🚀 Starting YouTube Auto Uploader")
     
     # Check if first-time auth is needed
-    if not os.path.exists("token.pickle"):
+    if not os.path.exists("token.json"):
         print("\n🔐 First time setup detected")
         
         # Check if we have client credentials
@@ -214,10 +246,10 @@ if __name__ == "__main__":
     # Upload video
     uploader = YouTubeAutoUploader()
     result = uploader.upload_video(
-        file_path=video_info.get("FILE", "output_video.mp4"),
-        title=video_info.get("TITLE", "Daily Video"),
-        description=video_info.get("DESCRIPTION", ""),
-        tags=video_info.get("TAGS", "").split(",")
+        file_path=video_info.get("video_file", "output_video.mp4"),
+        title=video_info.get("title", "Daily Video"),
+        description=video_info.get("description", ""),
+        tags=video_info.get("tags", [])
     )
     
     if result: